@@ -87,12 +87,13 @@ class OrchestratorMain:
         """
         try:
             logger.info(f"Starting analysis request: {analysis_request}")
-            start_time = time.time()
+            # 单调时钟计时，不受系统时间调整影响
+            start_ns = time.perf_counter_ns()
             
             # 执行分析（内部已实现三步工作流程）
             result = self.orchestrator.analyze_market(analysis_request, context)
             
-            execution_time = time.time() - start_time
+            execution_time = (time.perf_counter_ns() - start_ns) / 1e9
             result['execution_time_seconds'] = execution_time
             
             if result.get('success', False):
@@ -6,6 +6,7 @@ Simplified AI Trading System Main Application
 import os
 import time
 import threading
+from functools import lru_cache
 from dotenv import load_dotenv
 from src.logger import setup_logger
 from src.simple_data_manager import SimpleDataManager
@@ -14,10 +15,15 @@ from src.mcp_service import app as mcp_app
 
 logger = setup_logger()
 
+@lru_cache(maxsize=4)
+def _load_cfg(path):
+    """按路径缓存配置，避免同一文件重复解析yaml"""
+    return ConfigLoader(path).load_config()
+
 def start_mcp_service_in_thread():
     """在后台线程中启动MCP服务"""
     try:
-        config = ConfigLoader('config/enhanced_config.yaml').load_config()
+        config = _load_cfg('config/enhanced_config.yaml')
         mcp_config = config.get('mcp_service', {})
         host = mcp_config.get('host', '0.0.0.0')
         port = mcp_config.get('port', 5000)
@@ -53,7 +59,7 @@ def main():
         
         # 1. 先启动MCP服务（后台线程）
         print("🌐 启动MCP服务...")
-        config = ConfigLoader('config/enhanced_config.yaml').load_config()
+        config = _load_cfg('config/enhanced_config.yaml')
         mcp_config = config.get('mcp_service', {})
         host = mcp_config.get('host', '127.0.0.1')
         port = mcp_config.get('port', 5000)
@@ -8,26 +8,44 @@ AI Trading System Orchestrator - Project Manager Pattern
 """
 
 import json
+import time
 import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Literal
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pydantic import ConfigDict, Field, create_model
 
 from src.logger import setup_logger
 from src.config_loader import ConfigLoader
 
 logger = setup_logger()
 
-@dataclass
+def _dumps(obj: Any) -> str:
+    """使用orjson序列化为紧凑字符串（保留非ASCII字符，与ensure_ascii=False一致）"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+def _canon(value: Any) -> Any:
+    """把JSON参数规范化为可哈希的嵌套元组（字典按键排序），用作缓存键"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _canon(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canon(item) for item in value)
+    return value
+
+@dataclass(slots=True, frozen=True)
 class ToolCall:
     """工具调用请求"""
     name: str
     parameters: Dict[str, Any]
     call_id: str = None
 
-@dataclass  
+@dataclass(slots=True, frozen=True)
 class ToolResult:
     """工具调用结果"""
     call_id: str
@@ -35,6 +53,42 @@ class ToolResult:
     data: Any = None
     error_message: str = None
 
+# -------------------- 工具参数模型 --------------------
+# 由 config/AI_Trading_System_Tools.json 中的参数定义生成，
+# 解析AI给出的arguments字符串时一次完成JSON解析和校验
+
+_JSON_SCHEMA_TYPES = {
+    'string': str,
+    'integer': int,
+    'number': float,
+    'boolean': bool,
+    'array': list,
+    'object': dict
+}
+
+def _build_arg_model(tool: Dict[str, Any]) -> type:
+    """根据工具的JSON Schema参数定义生成pydantic模型（拒绝未定义的参数）"""
+    schema = tool.get('parameters') or {}
+    required = set(schema.get('required', []))
+    fields = {}
+    for name, spec in (schema.get('properties') or {}).items():
+        if 'enum' in spec:
+            annotation = Literal[tuple(spec['enum'])]
+        else:
+            annotation = _JSON_SCHEMA_TYPES.get(spec.get('type'), Any)
+        if name in required:
+            default = ...
+        else:
+            default = spec.get('default')
+            if default is None:
+                annotation = Optional[annotation]
+        fields[name] = (annotation, Field(default, ge=spec.get('minimum'), le=spec.get('maximum')))
+    return create_model(
+        f"{tool['name']}_args",
+        __config__=ConfigDict(extra='forbid'),
+        **fields
+    )
+
 class AIOrchestrator:
     """
     AI系统编排器 - 项目经理模式
@@ -63,6 +117,19 @@ class AIOrchestrator:
         self.base_url = self.ai_config.get('base_url', 'https://dashscope.aliyuncs.com/compatible-mode/v1')
         self.model = self.ai_config.get('model', 'qwen-plus')
         
+        # AI请求复用同一个会话（HTTP keep-alive），避免每轮对话重新握手
+        self._session = requests.Session()
+        retry_strategy = Retry(
+            total=3,
+            read=0,  # 读超时不重发，避免卡住的对话请求被重复计费
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["POST"]
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retry_strategy)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
         # MCP服务配置
         self.mcp_config = self.config.get('mcp_service', {})
         self.mcp_host = self.mcp_config.get('host', 'localhost')
@@ -72,6 +139,10 @@ class AIOrchestrator:
         # 加载AI配置文件
         self.system_prompt = self._load_system_prompt()
         self.tools_definition = self._load_tools_definition()
+        self._tool_arg_models = {
+            tool['name']: _build_arg_model(tool)
+            for tool in self.tools_definition.get('tools', [])
+        }
         
         # 对话历史
         self.conversation_history = []
@@ -86,6 +157,14 @@ class AIOrchestrator:
             'calculate_risk_metrics': '/calculate_risk_metrics'
         }
         
+        # 工具结果短期缓存：(工具名, 规范化参数元组) -> {expires_at, data, content}
+        # 仅在单次分析内去重，每次 analyze_market 开始时清空
+        self._tool_cache: Dict[tuple, Dict[str, Any]] = OrderedDict()
+        self._tool_cache_ttl = 30  # 秒
+        self._tool_cache_maxsize = 128
+        # 账户状态类工具随交易变化，不做缓存
+        self._uncached_tools = {'get_account_balance', 'get_positions'}
+        
         logger.info("AI Orchestrator initialized successfully")
     
     def _load_system_prompt(self) -> str:
@@ -130,6 +209,59 @@ class AIOrchestrator:
         if not self.mcp_api_key:
             raise ValueError("MCP_API_KEY not found in environment variables")
     
+    def _parse_tool_arguments(self, tool_name: str, arguments: str) -> Dict[str, Any]:
+        """
+        解析并校验AI给出的工具参数
+        
+        Args:
+            tool_name: 工具名称
+            arguments: AI返回的JSON参数字符串
+            
+        Returns:
+            校验后的参数字典（仅包含AI实际给出的字段）
+            
+        Raises:
+            ValueError: 参数不是合法JSON或不符合工具定义
+        """
+        model = self._tool_arg_models.get(tool_name)
+        if model is None:
+            return orjson.loads(arguments)
+        return model.model_validate_json(arguments or "{}").model_dump(exclude_unset=True)
+    
+    def _tool_cache_key(self, tool_call: ToolCall) -> tuple:
+        """生成工具调用的缓存键（参数按键排序，保证等价参数得到同一个键）"""
+        return (tool_call.name, _canon(tool_call.parameters))
+    
+    def _store_tool_cache(self, key: tuple, data: Any):
+        """写入工具结果缓存，超出容量时先清理过期项，再淘汰最久未使用的项"""
+        now = time.time()
+        # 覆盖已过期的同键项时先移除，使其重新排到最近使用的位置
+        self._tool_cache.pop(key, None)
+        if len(self._tool_cache) >= self._tool_cache_maxsize:
+            for expired_key in [k for k, v in self._tool_cache.items() if v['expires_at'] <= now]:
+                del self._tool_cache[expired_key]
+        while len(self._tool_cache) >= self._tool_cache_maxsize:
+            self._tool_cache.popitem(last=False)
+        
+        self._tool_cache[key] = {
+            'expires_at': now + self._tool_cache_ttl,
+            'data': data,
+            'content': None
+        }
+    
+    def _encode_tool_result(self, tool_call: ToolCall, result: ToolResult) -> str:
+        """序列化工具结果为tool消息内容，命中缓存时复用已编码的字符串"""
+        if not result.success:
+            return _dumps({"error": result.error_message})
+        
+        entry = self._tool_cache.get(self._tool_cache_key(tool_call))
+        if entry is None or entry['data'] is not result.data:
+            return _dumps(result.data)
+        
+        if entry['content'] is None:
+            entry['content'] = _dumps(entry['data'])
+        return entry['content']
+    
     def execute_tool_call(self, tool_call: ToolCall) -> ToolResult:
         """
         执行AI的工具调用请求
@@ -151,6 +283,20 @@ class AIOrchestrator:
                     error_message=f"未授权的工具: {tool_name}"
                 )
             
+            # 短期内相同参数的调用直接复用缓存结果
+            cacheable = tool_name not in self._uncached_tools
+            if cacheable:
+                cache_key = self._tool_cache_key(tool_call)
+                entry = self._tool_cache.get(cache_key)
+                if entry is not None and entry['expires_at'] > time.time():
+                    self._tool_cache.move_to_end(cache_key)
+                    logger.info(f"工具调用命中缓存: {tool_name}")
+                    return ToolResult(
+                        call_id=tool_call.call_id,
+                        success=True,
+                        data=entry['data']
+                    )
+            
             # 获取MCP端点
             mcp_endpoint = self.tool_mapping[tool_name]
             
@@ -163,7 +309,7 @@ class AIOrchestrator:
             
             # 记录工具调用
             logger.info(f"AI正在调用工具: {tool_name} -> {mcp_endpoint}")
-            logger.info(f"工具参数: {json.dumps(tool_call.parameters, ensure_ascii=False, indent=2)}")
+            logger.info(f"工具参数: {_dumps(tool_call.parameters)}")
             
             # 发送请求到MCP服务
             if mcp_endpoint in ['/get_kline']:
@@ -182,6 +328,9 @@ class AIOrchestrator:
             response.raise_for_status()
             result_data = response.json()
             
+            if cacheable:
+                self._store_tool_cache(cache_key, result_data)
+            
             # 成功返回结果
             logger.info(f"工具调用成功: {tool_name}")
             return ToolResult(
@@ -238,7 +387,7 @@ class AIOrchestrator:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
                 json=request_data,
@@ -267,6 +416,9 @@ class AIOrchestrator:
             # 加载API凭证
             self._load_api_credentials()
             
+            # 新一次分析不复用上一次的工具结果（价格、行情可能已变化）
+            self._tool_cache.clear()
+            
             # 构建系统消息
             system_message = {
                 "role": "system",
@@ -280,7 +432,7 @@ class AIOrchestrator:
             }
             
             if context:
-                user_message["content"] += f"\n\n上下文信息：{json.dumps(context, ensure_ascii=False, indent=2)}"
+                user_message["content"] += f"\n\n上下文信息：{_dumps(context)}"
             
             # 初始化对话
             messages = [system_message, user_message]
@@ -312,21 +464,42 @@ class AIOrchestrator:
                     analysis_log.append("✅ AI分析完成，没有更多工具调用")
                     break
                 
-                # 执行工具调用
+                # 执行工具调用（同一轮内工具名和参数都相同的调用只执行一次）
                 tool_results = []
+                round_results: Dict[tuple, ToolResult] = {}
                 for tool_call in tool_calls:
                     function_call = tool_call['function']
                     
-                    # 创建工具调用对象
+                    # 创建工具调用对象（参数不合法时直接把错误反馈给AI）
+                    try:
+                        parameters = self._parse_tool_arguments(function_call['name'], function_call['arguments'])
+                        parse_error = None
+                    except ValueError as e:
+                        parameters = {}
+                        parse_error = f"工具参数无效: {e}"
+                    
                     call_request = ToolCall(
                         name=function_call['name'],
-                        parameters=json.loads(function_call['arguments']),
+                        parameters=parameters,
                         call_id=tool_call['id']
                     )
                     
                     # 执行工具调用
-                    result = self.execute_tool_call(call_request)
-                    tool_results.append(result)
+                    if parse_error:
+                        result = ToolResult(
+                            call_id=call_request.call_id,
+                            success=False,
+                            error_message=parse_error
+                        )
+                    else:
+                        round_key = self._tool_cache_key(call_request)
+                        previous = round_results.get(round_key)
+                        if previous is not None:
+                            result = replace(previous, call_id=call_request.call_id)
+                        else:
+                            result = self.execute_tool_call(call_request)
+                            round_results[round_key] = result
+                    tool_results.append((call_request, result))
                     
                     # 记录到分析日志
                     if result.success:
@@ -335,11 +508,11 @@ class AIOrchestrator:
                         analysis_log.append(f"❌ 工具调用失败: {call_request.name} - {result.error_message}")
                 
                 # 将工具结果添加到消息中
-                for tool_call, result in zip(tool_calls, tool_results):
+                for call_request, result in tool_results:
                     tool_message = {
                         "role": "tool",
-                        "tool_call_id": tool_call['id'],
-                        "content": json.dumps(result.data if result.success else {"error": result.error_message}, ensure_ascii=False)
+                        "tool_call_id": call_request.call_id,
+                        "content": self._encode_tool_result(call_request, result)
                     }
                     messages.append(tool_message)
             
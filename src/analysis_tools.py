@@ -321,8 +321,8 @@ class AnalysisTools:
                 timeframes = []
                 for file_info in files:
                     filename = file_info.get("name", "")
-                    if filename.endswith(".csv"):
-                        tf = filename.split("/")[0] if "/" in filename else filename.replace(".csv", "")
+                    if filename.endswith((".csv", ".parquet")):
+                        tf = filename.split("/")[0] if "/" in filename else filename.rsplit(".", 1)[0]
                         if tf not in timeframes:
                             timeframes.append(tf)
                 
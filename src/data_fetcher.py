@@ -10,12 +10,16 @@ import pandas as pd
 
 logger = setup_logger()
 
+# (连接超时, 读取超时)，避免并发获取时个别请求无限挂起占住工作线程
+REQUEST_TIMEOUT = (3, 10)
+
 class DataFetcher:
-    def __init__(self, api_key, secret_key, passphrase, base_url="https://www.okx.com"):
+    def __init__(self, api_key, secret_key, passphrase, base_url="https://www.okx.com", timeout=REQUEST_TIMEOUT):
         self.api_key = api_key
         self.secret_key = secret_key
         self.passphrase = passphrase
         self.base_url = base_url
+        self.timeout = timeout
         self.session = requests.Session()
         retry_strategy = Retry(
             total=5,
@@ -51,7 +55,7 @@ class DataFetcher:
         
         try:
             logger.info(f"Fetching funding rate for {instrument_id}...")
-            response = self.session.get(f"{self.base_url}{endpoint}", headers=headers, params=params)
+            response = self.session.get(f"{self.base_url}{endpoint}", headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             data = response.json().get("data", [])
             
@@ -114,7 +118,8 @@ class DataFetcher:
             logger.info(f"Fetching current k-line for {instrument_id} at {bar}...")
             response = self.session.get(f"{self.base_url}{endpoint}", 
                                      headers=headers, 
-                                     params=params)
+                                     params=params,
+                                     timeout=self.timeout)
             response.raise_for_status()
             data = response.json().get("data", [])
             
@@ -143,7 +148,8 @@ class DataFetcher:
             logger.info(f"Fetching market tickers for {instrument_id}...")
             response = self.session.get(f"{self.base_url}{endpoint}", 
                                      headers=headers, 
-                                     params=params)
+                                     params=params,
+                                     timeout=self.timeout)
             response.raise_for_status()
             data = response.json().get("data", [])
             
@@ -204,7 +210,7 @@ class DataFetcher:
         headers = self._get_headers("GET", endpoint, "")
         try:
             logger.info(f"Fetching K-line data from {endpoint} ({limit} points) for {instrument_id} at {bar}...")
-            response = self.session.get(self.base_url + endpoint, headers=headers, params=params)
+            response = self.session.get(self.base_url + endpoint, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             raw_data = response.json().get("data", [])
 
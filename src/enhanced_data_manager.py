@@ -9,6 +9,8 @@ Enhanced Data Manager
 import os
 import pandas as pd
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
@@ -55,6 +57,14 @@ class EnhancedDataManager:
         
         # 初始化技术指标计算器
         self.indicator_calculator = EnhancedTechnicalIndicator(self.config.get('indicators', {}))
+        # 各时间周期并发获取的线程池，随管理器常驻，避免每轮获取都重新创建线程
+        # requests.Session 不保证线程安全，工作线程各自使用独立的 DataFetcher
+        self._thread_local = threading.local()
+        timeframe_count = sum(len(tfs) for tfs in self.config.get('timeframes', {}).values())
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(8, timeframe_count)),
+            thread_name_prefix="timeframe"
+        )
         
         # 创建数据存储目录结构
         self.base_directory = self.config.get('storage', {}).get('base_directory', 'kline_data')
@@ -62,6 +72,15 @@ class EnhancedDataManager:
         
         logger.info("Enhanced Data Manager initialized successfully")
     
+    def close(self):
+        """关闭时间周期线程池（不等待正在执行的任务）"""
+        executor = getattr(self, '_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def __del__(self):
+        self.close()
+    
     def normalize_timeframe(self, timeframe):
         """将时间周期标准化为小写短格式（用于目录命名）"""
         return timeframe.lower()
@@ -91,13 +110,12 @@ class EnhancedDataManager:
             base_path = Path(self.base_directory)
             base_path.mkdir(exist_ok=True)
             
-            # 为每个时间周期创建目录（使用标准化名称）
-            all_timeframes = []
+            # 为每个时间周期创建目录（使用标准化名称，去重后每个目录只创建一次）
+            normalized_timeframes = set()
             for category, tfs in self.config.get('timeframes', {}).items():
-                all_timeframes.extend(tfs)
+                normalized_timeframes.update(self.normalize_timeframe(tf) for tf in tfs)
             
-            for tf in all_timeframes:
-                normalized_tf = self.normalize_timeframe(tf)
+            for normalized_tf in normalized_timeframes:
                 tf_path = base_path / normalized_tf
                 tf_path.mkdir(exist_ok=True)
             
@@ -154,62 +172,17 @@ class EnhancedDataManager:
         
         processed_timeframes = []
         
-        for timeframe in timeframes:
-            try:
-                logger.info(f"Processing {timeframe} data for {symbol}...")
-                
-                # 获取配置
-                kline_config = self.config.get('kline_config', {}).get(timeframe, {})
-                fetch_count = kline_config.get('fetch_count', 100)
-                output_count = kline_config.get('output_count', 50)
-                
-                # 获取K线数据
-                kline_data = self._fetch_single_timeframe_data(
-                    symbol, timeframe, fetch_count, output_count
-                )
-                
-                if kline_data.empty:
-                    logger.warning(f"No data received for {timeframe}")
-                    results['failed'].append({
-                        'timeframe': timeframe,
-                        'reason': 'No data received'
-                    })
-                    continue
-                
-                # 计算技术指标
-                category = self.get_category_for_timeframe(timeframe)
-                kline_data_with_indicators = self.indicator_calculator.calculate_all_indicators(
-                    kline_data.copy(), category
-                )
-                
-                # 添加信号分析
-                kline_data_with_indicators = self.indicator_calculator.add_signal_analysis(
-                    kline_data_with_indicators
-                )
-                
-                # 保存数据（使用新的短文件名格式）
-                save_result = self._save_data(
-                    kline_data, kline_data_with_indicators, 
-                    symbol, timeframe
-                )
-                
-                processed_timeframes.append(self.normalize_timeframe(timeframe))
-                
-                results['success'].append({
-                    'timeframe': timeframe,
-                    'records_count': len(kline_data_with_indicators),
-                    'file_paths': save_result,
-                    'category': category
-                })
-                
-                logger.info(f"Successfully processed {timeframe}: {len(kline_data_with_indicators)} records")
-                
-            except Exception as e:
-                logger.error(f"Error processing {timeframe}: {e}")
-                results['failed'].append({
-                    'timeframe': timeframe,
-                    'reason': str(e)
-                })
+        # 各时间周期相互独立，并发获取（耗时主要在等待OKX接口响应）
+        outcomes = list(self._executor.map(
+            lambda tf: self._process_timeframe(symbol, tf), timeframes
+        ))
+        
+        for succeeded, entry in outcomes:
+            if succeeded:
+                processed_timeframes.append(self.normalize_timeframe(entry['timeframe']))
+                results['success'].append(entry)
+            else:
+                results['failed'].append(entry)
         
         # 清理未获取的时间周期数据
         self.cleanup_unused_timeframes(processed_timeframes)
@@ -219,6 +192,89 @@ class EnhancedDataManager:
         
         return results
     
+    def _process_timeframe(self, symbol, timeframe):
+        """
+        获取、计算并保存单个时间周期的数据
+        
+        Returns:
+            tuple: (是否成功, 结果记录)
+        """
+        try:
+            logger.info(f"Processing {timeframe} data for {symbol}...")
+            
+            # 获取配置
+            kline_config = self.config.get('kline_config', {}).get(timeframe, {})
+            fetch_count = kline_config.get('fetch_count', 100)
+            output_count = kline_config.get('output_count', 50)
+            
+            # 获取K线数据
+            kline_data = self._fetch_single_timeframe_data(
+                symbol, timeframe, fetch_count, output_count
+            )
+            
+            if kline_data.empty:
+                logger.warning(f"No data received for {timeframe}")
+                return False, {
+                    'timeframe': timeframe,
+                    'reason': 'No data received'
+                }
+            
+            # 退化数据直接跳过，不做无意义的指标计算
+            if kline_data['close'].isna().all():
+                logger.warning(f"No valid close prices for {timeframe}")
+                return False, {
+                    'timeframe': timeframe,
+                    'reason': 'No valid close prices'
+                }
+            
+            category = self.get_category_for_timeframe(timeframe)
+            min_rows = self.indicator_calculator.min_required_rows(category)
+            if len(kline_data) < min_rows:
+                logger.warning(f"Insufficient data for {timeframe}: {len(kline_data)} < {min_rows}")
+                return False, {
+                    'timeframe': timeframe,
+                    'reason': f'Insufficient data: {len(kline_data)} < {min_rows}'
+                }
+            
+            # 计算技术指标（kline_data 为本次新获取的数据，直接追加指标列，无需先复制）
+            kline_data_with_indicators = self.indicator_calculator.calculate_all_indicators(
+                kline_data, category
+            )
+            
+            # 添加信号分析
+            kline_data_with_indicators = self.indicator_calculator.add_signal_analysis(
+                kline_data_with_indicators
+            )
+            
+            # 保存数据（使用新的短文件名格式）
+            save_result = self._save_data(
+                kline_data, kline_data_with_indicators, 
+                symbol, timeframe
+            )
+            
+            logger.info(f"Successfully processed {timeframe}: {len(kline_data_with_indicators)} records")
+            return True, {
+                'timeframe': timeframe,
+                'records_count': len(kline_data_with_indicators),
+                'file_paths': save_result,
+                'category': category
+            }
+            
+        except Exception as e:
+            logger.error(f"Error processing {timeframe}: {e}")
+            return False, {
+                'timeframe': timeframe,
+                'reason': str(e)
+            }
+    
+    def _thread_data_fetcher(self):
+        """返回当前工作线程专用的 DataFetcher（各线程持有独立的 requests 会话）"""
+        fetcher = getattr(self._thread_local, 'data_fetcher', None)
+        if fetcher is None:
+            fetcher = DataFetcher(self.api_key, self.secret_key, self.passphrase)
+            self._thread_local.data_fetcher = fetcher
+        return fetcher
+    
     def _fetch_single_timeframe_data(self, symbol, timeframe, fetch_count, output_count):
         """
         获取单个时间周期的K线数据
@@ -229,7 +285,7 @@ class EnhancedDataManager:
             logger.info(f"Using OKX timeframe format: {timeframe} -> {okx_timeframe}")
             
             # 获取历史K线数据
-            kline_df = self.data_fetcher.fetch_kline_data(
+            kline_df = self._thread_data_fetcher().fetch_kline_data(
                 instrument_id=symbol,
                 bar=okx_timeframe,
                 is_mark_price=False,
@@ -241,7 +297,7 @@ class EnhancedDataManager:
             
             # 获取当前未完结K线（使用OKX格式）
             try:
-                current_kline_df = self.data_fetcher.get_current_kline(symbol, okx_timeframe)
+                current_kline_df = self._thread_data_fetcher().get_current_kline(symbol, okx_timeframe)
                 if not current_kline_df.empty:
                     kline_df = pd.concat([kline_df, current_kline_df])
             except Exception as e:
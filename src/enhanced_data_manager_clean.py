@@ -67,19 +67,17 @@ class EnhancedDataManager:
             base_path = Path(self.base_directory)
             base_path.mkdir(exist_ok=True)
             
-            # 为每个时间周期创建目录
-            all_timeframes = []
+            # 为每个时间周期创建目录（去重）
+            all_timeframes = set()
             for category, tfs in self.config.get('timeframes', {}).items():
-                all_timeframes.extend(tfs)
+                all_timeframes.update(tfs)
             
+            # 只创建叶子子目录，parents=True 会按需补建时间周期目录；
+            # 目录已存在时每个路径只需一次系统调用
             for tf in all_timeframes:
                 tf_path = base_path / tf
-                tf_path.mkdir(exist_ok=True)
-                
-                # 创建子目录
-                (tf_path / "kline").mkdir(exist_ok=True)
-                (tf_path / "indicators").mkdir(exist_ok=True)
-                (tf_path / "combined").mkdir(exist_ok=True)
+                for sub_dir in ("kline", "indicators", "combined"):
+                    (tf_path / sub_dir).mkdir(parents=True, exist_ok=True)
             
             # 创建备份目录
             backup_dir = self.config.get('storage', {}).get('backup_directory', 'kline_data_backup')
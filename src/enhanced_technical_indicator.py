@@ -59,13 +59,12 @@ class EnhancedTechnicalIndicator:
     def calculate_macd(self, data, fast=12, slow=26, signal=9):
         """计算MACD指标"""
         try:
-            macd_line = ta.trend.macd(data['close'], window_slow=slow, window_fast=fast)
-            macd_signal = ta.trend.macd_signal(data['close'], window_slow=slow, window_fast=fast, window_sign=signal)
-            macd_histogram = ta.trend.macd_diff(data['close'], window_slow=slow, window_fast=fast, window_sign=signal)
+            # 同一个MACD对象只计算一次快慢EMA，三条线都从中取出
+            macd = ta.trend.MACD(data['close'], window_slow=slow, window_fast=fast, window_sign=signal)
             
-            data['MACD'] = macd_line
-            data['MACD_Signal'] = macd_signal
-            data['MACD_Histogram'] = macd_histogram
+            data['MACD'] = macd.macd()
+            data['MACD_Signal'] = macd.macd_signal()
+            data['MACD_Histogram'] = macd.macd_diff()
             
             logger.info(f"Calculated MACD with fast={fast}, slow={slow}, signal={signal}")
             return data
@@ -76,9 +75,11 @@ class EnhancedTechnicalIndicator:
     def calculate_bollinger_bands(self, data, period=20, std_dev=2.0):
         """计算布林带"""
         try:
-            bb_upper = ta.volatility.bollinger_hband(data['close'], window=period, window_dev=std_dev)
-            bb_middle = ta.volatility.bollinger_mavg(data['close'], window=period)
-            bb_lower = ta.volatility.bollinger_lband(data['close'], window=period, window_dev=std_dev)
+            # 滚动均值和标准差只计算一次
+            bollinger = ta.volatility.BollingerBands(data['close'], window=period, window_dev=std_dev)
+            bb_upper = bollinger.bollinger_hband()
+            bb_middle = bollinger.bollinger_mavg()
+            bb_lower = bollinger.bollinger_lband()
             
             data['BB_Upper'] = bb_upper
             data['BB_Middle'] = bb_middle
@@ -105,11 +106,13 @@ class EnhancedTechnicalIndicator:
     def calculate_stochastic(self, data, k_period=14, d_period=3, smooth=3):
         """计算随机指标"""
         try:
-            stoch_k = ta.momentum.stoch(data['high'], data['low'], data['close'], window=k_period, smooth_window=smooth)
-            stoch_d = ta.momentum.stoch_signal(data['high'], data['low'], data['close'], window=k_period, smooth_window=d_period)
+            # %K 不受 smooth_window 影响，只需按 d_period 构造一次即可同时得到 %K 和 %D
+            stochastic = ta.momentum.StochasticOscillator(
+                data['high'], data['low'], data['close'], window=k_period, smooth_window=d_period
+            )
             
-            data['Stoch_K'] = stoch_k
-            data['Stoch_D'] = stoch_d
+            data['Stoch_K'] = stochastic.stoch()
+            data['Stoch_D'] = stochastic.stoch_signal()
             
             logger.info(f"Calculated Stochastic with K={k_period}, D={d_period}, smooth={smooth}")
             return data
@@ -177,6 +180,21 @@ class EnhancedTechnicalIndicator:
             logger.error(f"Error calculating momentum indicators: {e}")
             return data
     
+    def get_category_config(self, category="medium_term"):
+        """获取指定类别的指标参数（未知类别使用通用配置）"""
+        config_key = category if category in ['short_term', 'medium_term', 'long_term'] else 'common'
+        return self.params.get(config_key, self.params.get('common', {}))
+    
+    def min_required_rows(self, category="medium_term"):
+        """核心指标（RSI/布林带/MACD/ATR）所需的最少K线数量"""
+        indicator_config = self.get_category_config(category)
+        return max(
+            indicator_config.get('rsi_period', 14),
+            indicator_config.get('bb_period', 20),
+            indicator_config.get('macd_slow', 26),
+            indicator_config.get('atr_period', 14)
+        )
+    
     def calculate_all_indicators(self, data, category="medium_term"):
         """
         计算所有技术指标
@@ -192,8 +210,7 @@ class EnhancedTechnicalIndicator:
             logger.info(f"Calculating all indicators for category: {category}")
             
             # 获取配置参数
-            config_key = category if category in ['short_term', 'medium_term', 'long_term'] else 'common'
-            indicator_config = self.params.get(config_key, self.params.get('common', {}))
+            indicator_config = self.get_category_config(category)
             
             # 基础移动平均线
             if 'sma_periods' in indicator_config:
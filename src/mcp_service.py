@@ -88,6 +88,12 @@ def safe_join(name: str) -> str:
         raise HTTPException(status_code=400, detail="invalid filename")
     return full
 
+def read_data_file(path: str) -> pd.DataFrame:
+    """按扩展名读取数据文件（parquet 或 CSV）"""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
 def file_fingerprint(path: str) -> str:
     """轻量文件指纹：mtime_ns + size，便于审计对比"""
     try:
@@ -118,7 +124,7 @@ class DeauthorizeReq(BaseModel):
     files: List[str]
 
 class KlineReq(BaseModel):
-    name: str  # 文件名，如 "1H/BTC-USD-SWAP_1H_latest.csv"
+    name: str  # 文件名，如 "1H/BTC-USD-SWAP_1H.parquet"
     start: Optional[str] = None  # 开始时间，格式如 "2024-01-01 00:00:00"
     end: Optional[str] = None    # 结束时间
     max_bars: Optional[int] = 500  # 最大返回行数
@@ -264,9 +270,12 @@ def read_file(file_path: str, api_key: str = Depends(get_api_key)):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
         
-        # 读取文件内容
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # 读取文件内容（parquet 转为 CSV 文本返回，与分析工具的解析方式一致）
+        if full_path.endswith(".parquet"):
+            content = read_data_file(full_path).to_csv(index=False)
+        else:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                content = f.read()
         
         # 记录审计日志
         append_audit({
@@ -296,11 +305,11 @@ def get_kline(req: KlineReq, api_key: str = Depends(get_api_key)):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail=f"file not found: {req.name}")
         
-        # 读取 CSV 数据
+        # 读取数据文件（CSV 或 parquet）
         try:
-            df = pd.read_csv(full_path)
+            df = read_data_file(full_path)
         except Exception as e:
-            raise HTTPException(status_code=400, detail=f"failed to read CSV: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"failed to read data file: {str(e)}")
         
         original_count = len(df)
         
@@ -365,7 +374,7 @@ def read_tail(req: ReadTailReq, api_key: str = Depends(get_api_key)):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail=f"file not found: {req.name}")
         
-        df = pd.read_csv(full_path)
+        df = read_data_file(full_path)
         lines = min(req.lines or 50, 200)  # 最多200行
         tail_df = df.tail(lines)
         
@@ -10,7 +10,9 @@ import json
 import time
 import uuid
 import asyncio
+import itertools
 import threading
+from collections import deque
 from typing import Dict, List, Callable, Any, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
@@ -19,7 +21,7 @@ from src.logger import setup_logger
 
 logger = setup_logger()
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """消息类定义"""
     id: str
@@ -31,9 +33,11 @@ class Message:
     retry_count: int = 0
     max_retries: int = 3
     
-    def is_expired(self) -> bool:
-        """检查消息是否过期"""
-        return time.time() - self.timestamp > self.ttl
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """检查消息是否过期（批量检查时可传入同一个当前时间，避免逐条取时钟）"""
+        if now is None:
+            now = time.time()
+        return now - self.timestamp > self.ttl
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -47,11 +51,19 @@ class MemoryMessageQueue:
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self._topics: Dict[str, List[Message]] = {}
-        self._subscribers: Dict[str, List[Callable]] = {}
-        self._lock = threading.RLock()
+        self._topics: Dict[str, deque] = {}
+        # 每个主题的订阅者以有序字典保存（键为回调本身），O(1)查找和移除
+        self._subscribers: Dict[str, Dict[Callable, None]] = {}
+        self._lock = threading.Lock()
         self._running = False
+        self._stop_event = threading.Event()
         self._cleanup_interval = 300  # 5分钟清理一次过期消息
+        # 每个主题最多保留的消息数，超出时O(1)淘汰最旧消息
+        self._max_queue_size = config.get('max_queue_size', 10000)
+        self._dropped_messages_count = 0
+        # 消息ID：进程内随机前缀 + 单调递增序号（itertools.count在CPython中线程安全）
+        self._seq = itertools.count()
+        self._seq_prefix = uuid.uuid4().hex[:8]
         self._executor = ThreadPoolExecutor(max_workers=4)
         
         # 初始化主题
@@ -64,8 +76,8 @@ class MemoryMessageQueue:
         topics = self.config.get('topics', {})
         with self._lock:
             for topic_name, topic_path in topics.items():
-                self._topics[topic_path] = []
-                self._subscribers[topic_path] = []
+                self._topics[topic_path] = deque(maxlen=self._max_queue_size)
+                self._subscribers[topic_path] = {}
         
         logger.info(f"Initialized {len(topics)} topics: {list(topics.values())}")
     
@@ -75,6 +87,7 @@ class MemoryMessageQueue:
             return
         
         self._running = True
+        self._stop_event.clear()
         # 启动清理任务
         self._executor.submit(self._cleanup_task)
         logger.info("Message Queue started")
@@ -82,6 +95,8 @@ class MemoryMessageQueue:
     def stop(self):
         """停止消息队列"""
         self._running = False
+        # 唤醒等待中的清理任务，避免关闭时阻塞到下一个清理周期
+        self._stop_event.set()
         self._executor.shutdown(wait=True)
         logger.info("Message Queue stopped")
     
@@ -97,7 +112,7 @@ class MemoryMessageQueue:
         Returns:
             str: 消息ID
         """
-        message_id = str(uuid.uuid4())
+        message_id = f"{self._seq_prefix}{next(self._seq):012x}"
         ttl = self.config.get('message_ttl', 3600)
         max_retries = self.config.get('retry_attempts', 3)
         
@@ -111,18 +126,25 @@ class MemoryMessageQueue:
             max_retries=max_retries
         )
         
+        # 主题通常已存在：先无锁检查，只有缺失时才加锁创建（双重检查）
+        if topic not in self._topics:
+            with self._lock:
+                if topic not in self._topics:
+                    self._topics[topic] = deque(maxlen=self._max_queue_size)
+        
         with self._lock:
-            if topic not in self._topics:
-                self._topics[topic] = []
+            topic_queue = self._topics[topic]
+            if len(topic_queue) == topic_queue.maxlen:
+                self._dropped_messages_count += 1
+            topic_queue.append(message)
             
-            self._topics[topic].append(message)
-            
-            # 异步通知订阅者
-            if topic in self._subscribers:
-                for callback in self._subscribers[topic]:
-                    self._executor.submit(self._safe_callback, callback, message)
+            callbacks = tuple(self._subscribers.get(topic, ()))
+        
+        # 异步通知订阅者（在锁外提交，缩短临界区）
+        for callback in callbacks:
+            self._executor.submit(self._safe_callback, callback, message)
         
-        logger.info(f"Published message {message_id} to topic '{topic}' from {sender}")
+        logger.debug(f"Published message {message_id} to topic '{topic}' from {sender}")
         return message_id
     
     def subscribe(self, topic: str, callback: Callable[[Message], None]) -> bool:
@@ -138,9 +160,9 @@ class MemoryMessageQueue:
         """
         with self._lock:
             if topic not in self._subscribers:
-                self._subscribers[topic] = []
+                self._subscribers[topic] = {}
             
-            self._subscribers[topic].append(callback)
+            self._subscribers[topic][callback] = None
         
         logger.info(f"Subscribed to topic '{topic}' with callback {callback.__name__}")
         return True
@@ -158,7 +180,7 @@ class MemoryMessageQueue:
         """
         with self._lock:
             if topic in self._subscribers and callback in self._subscribers[topic]:
-                self._subscribers[topic].remove(callback)
+                del self._subscribers[topic][callback]
                 logger.info(f"Unsubscribed from topic '{topic}'")
                 return True
         
@@ -179,17 +201,20 @@ class MemoryMessageQueue:
             if topic not in self._topics:
                 return []
             
-            messages = [msg for msg in self._topics[topic] if not msg.is_expired()]
+            now = time.time()
+            messages = [msg for msg in self._topics[topic] if not msg.is_expired(now)]
             return messages[-limit:] if len(messages) > limit else messages
     
     def get_queue_stats(self) -> Dict[str, Any]:
         """获取队列统计信息"""
         with self._lock:
+            now = time.time()
             stats = {
                 'total_topics': len(self._topics),
                 'total_subscribers': sum(len(subs) for subs in self._subscribers.values()),
+                'dropped_messages_count': self._dropped_messages_count,
                 'topic_message_counts': {
-                    topic: len([msg for msg in messages if not msg.is_expired()])
+                    topic: sum(1 for msg in messages if not msg.is_expired(now))
                     for topic, messages in self._topics.items()
                 },
                 'subscriber_counts': {
@@ -220,22 +245,26 @@ class MemoryMessageQueue:
         while self._running:
             try:
                 with self._lock:
+                    now = time.time()
                     for topic in self._topics:
                         original_count = len(self._topics[topic])
-                        self._topics[topic] = [
-                            msg for msg in self._topics[topic] if not msg.is_expired()
-                        ]
+                        self._topics[topic] = deque(
+                            (msg for msg in self._topics[topic] if not msg.is_expired(now)),
+                            maxlen=self._max_queue_size
+                        )
                         cleaned_count = original_count - len(self._topics[topic])
                         
                         if cleaned_count > 0:
                             logger.debug(f"Cleaned {cleaned_count} expired messages from topic '{topic}'")
                 
-                # 等待清理间隔
-                time.sleep(self._cleanup_interval)
+                # 等待清理间隔（stop时立即返回）
+                if self._stop_event.wait(self._cleanup_interval):
+                    break
                 
             except Exception as e:
                 logger.error(f"Error in cleanup task: {e}")
-                time.sleep(60)  # 错误时等待1分钟再重试
+                if self._stop_event.wait(60):  # 错误时等待1分钟再重试
+                    break
 
 class MessageQueueManager:
     """
@@ -5,8 +5,11 @@ Simplified Data Manager for AI Trading System
 
 import os
 import json
+import threading
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
@@ -18,6 +21,15 @@ from src.enhanced_technical_indicator import EnhancedTechnicalIndicator
 
 logger = setup_logger()
 
+# 数据文件后缀（K线+技术指标）
+DATA_FILE_SUFFIXES = ('.csv', '.parquet')
+
+# MCP服务共享会话（保持长连接，避免每次授权都重新建立TCP连接）
+_mcp_session = requests.Session()
+_mcp_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+_mcp_session.mount("http://", _mcp_adapter)
+_mcp_session.mount("https://", _mcp_adapter)
+
 class SimpleDataManager:
     def __init__(self, config_path="config/enhanced_config.yaml"):
         self.config_loader = ConfigLoader(config_path)
@@ -39,15 +51,38 @@ class SimpleDataManager:
         )
         self.data_fetcher = DataFetcher(self.api_key, self.secret_key, self.passphrase)
         self.indicator_calculator = EnhancedTechnicalIndicator(self.config.get('indicators', {}))
+        # 各时间周期并发获取的线程池，随管理器常驻，避免每轮获取都重新创建线程
+        # requests.Session 不保证线程安全，工作线程各自使用独立的 DataFetcher
+        self._thread_local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=min(8, len(self._get_all_timeframes_from_config())),
+            thread_name_prefix="timeframe"
+        )
         
         self.base_directory = 'kline_data'
         self._create_directories()
         
+        # MCP服务地址只在初始化时解析一次
+        mcp_config = self.config.get('mcp_service', {})
+        self._mcp_host = mcp_config.get('host', '127.0.0.1')
+        self._mcp_port = mcp_config.get('port', 5000)
+        self._mcp_base_url = f"http://{self._mcp_host}:{self._mcp_port}"
+        self._http = _mcp_session
+        
         logger.info("Simple Data Manager initialized successfully")
         
         # 初始化时授权所有现有文件
         self.authorize_all_existing_files_to_mcp()
     
+    def close(self):
+        """关闭时间周期线程池（不等待正在执行的任务）"""
+        executor = getattr(self, '_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def __del__(self):
+        self.close()
+    
     def _get_all_timeframes_from_config(self):
         """从配置文件获取所有时间周期"""
         timeframes_config = self.config.get('timeframes', {})
@@ -85,11 +120,11 @@ class SimpleDataManager:
         # 如果指定类别不存在，使用通用配置
         return indicators_config.get('common', {})
     
-    def _auto_authorize_file_to_mcp(self, timeframe, filename):
-        """自动授权新生成的文件到MCP服务"""
+    def _auto_authorize_files_to_mcp(self, file_list):
+        """自动授权新生成的文件到MCP服务（一次请求批量授权）"""
         try:
-            # 构造文件相对路径（相对于kline_data目录）
-            relative_path = f"{timeframe}/{filename}"
+            if not file_list:
+                return
             
             # 获取MCP API Key
             mcp_api_key = os.getenv("MCP_API_KEY")
@@ -104,24 +139,18 @@ class SimpleDataManager:
             }
             
             data = {
-                "files": [relative_path]
+                "files": file_list
             }
             
-            # 使用配置中的MCP服务地址
-            config = ConfigLoader('config/enhanced_config.yaml').load_config()
-            mcp_config = config.get('mcp_service', {})
-            host = mcp_config.get('host', '127.0.0.1')
-            port = mcp_config.get('port', 5000)
-            
-            response = requests.post(
-                f"http://{host}:{port}/authorize",
+            response = self._http.post(
+                f"{self._mcp_base_url}/authorize",
                 json=data,
                 headers=headers,
                 timeout=5
             )
             
             if response.status_code == 200:
-                logger.info(f"成功授权文件到MCP: {relative_path}")
+                logger.info(f"成功授权 {len(file_list)} 个文件到MCP")
             else:
                 logger.warning(f"MCP授权失败: {response.status_code} - {response.text}")
                 
@@ -162,72 +191,114 @@ class SimpleDataManager:
         results = {'success': [], 'failed': []}
         processed_files = []
         
-        for timeframe in timeframes:
-            try:
-                logger.info(f"Processing {timeframe} for {symbol}")
-                
-                # OKX API格式转换
-                api_timeframe = self._convert_timeframe_for_api(timeframe)
-                
-                # 获取K线数据
-                kline_data = self.data_fetcher.fetch_kline_data(
-                    instrument_id=symbol, bar=api_timeframe, limit=100
-                )
-                
-                if kline_data.empty:
-                    results['failed'].append({
-                        'timeframe': timeframe,
-                        'reason': 'No data received'
-                    })
-                    continue
-                
-                # 计算技术指标（使用配置驱动）
-                kline_with_indicators = self.indicator_calculator.calculate_all_indicators(
-                    kline_data.copy(), category
-                )
-                
-                # 保存数据
-                file_paths = self._save_timeframe_data(
-                    kline_data, kline_with_indicators, symbol, timeframe
-                )
-                
-                # 记录处理的文件
-                if 'filename' in file_paths:
-                    processed_files.append(f"{timeframe}/{file_paths['filename']}")
-                    # 自动授权文件到MCP服务
-                    self._auto_authorize_file_to_mcp(timeframe, file_paths['filename'])
-                
-                results['success'].append({
-                    'timeframe': timeframe,
-                    'records': len(kline_with_indicators),
-                    'file_paths': file_paths
-                })
-                
-                logger.info(f"Successfully processed {timeframe}: {len(kline_with_indicators)} records")
-                
-            except Exception as e:
-                logger.error(f"Error processing {timeframe}: {e}")
-                results['failed'].append({
-                    'timeframe': timeframe,
-                    'reason': str(e)
-                })
+        # 各时间周期相互独立，并发获取（耗时主要在等待OKX接口响应）
+        outcomes = list(self._executor.map(
+            lambda tf: self._process_timeframe(symbol, tf, category), timeframes
+        ))
+        
+        for succeeded, entry in outcomes:
+            if not succeeded:
+                results['failed'].append(entry)
+                continue
+            
+            # 记录处理的文件
+            file_paths = entry['file_paths']
+            if 'filename' in file_paths:
+                processed_files.append(f"{entry['timeframe']}/{file_paths['filename']}")
+            results['success'].append(entry)
+        
+        # 自动授权本次生成的文件到MCP服务（所有时间周期合并为一次请求）
+        self._auto_authorize_files_to_mcp(processed_files)
         
         # 2. 获取数据后，清理未在本次处理中更新的文件
         self._cleanup_outdated_files(symbol, current_files_before, processed_files)
         
         return results
     
+    def _thread_data_fetcher(self):
+        """返回当前工作线程专用的 DataFetcher（各线程持有独立的 requests 会话）"""
+        fetcher = getattr(self._thread_local, 'data_fetcher', None)
+        if fetcher is None:
+            fetcher = DataFetcher(self.api_key, self.secret_key, self.passphrase)
+            self._thread_local.data_fetcher = fetcher
+        return fetcher
+    
+    def _process_timeframe(self, symbol, timeframe, category):
+        """获取、计算并保存单个时间周期的数据，返回 (是否成功, 结果记录)"""
+        try:
+            logger.info(f"Processing {timeframe} for {symbol}")
+            
+            # OKX API格式转换
+            api_timeframe = self._convert_timeframe_for_api(timeframe)
+            
+            # 获取K线数据
+            kline_data = self._thread_data_fetcher().fetch_kline_data(
+                instrument_id=symbol, bar=api_timeframe, limit=100
+            )
+            
+            if kline_data.empty:
+                return False, {
+                    'timeframe': timeframe,
+                    'reason': 'No data received'
+                }
+            
+            # 退化数据直接跳过，不做无意义的指标计算
+            if kline_data['close'].isna().all():
+                logger.warning(f"No valid close prices for {timeframe}")
+                return False, {
+                    'timeframe': timeframe,
+                    'reason': 'No valid close prices'
+                }
+            
+            min_rows = self.indicator_calculator.min_required_rows(category)
+            if len(kline_data) < min_rows:
+                logger.warning(f"Insufficient data for {timeframe}: {len(kline_data)} < {min_rows}")
+                return False, {
+                    'timeframe': timeframe,
+                    'reason': f'Insufficient data: {len(kline_data)} < {min_rows}'
+                }
+            
+            # 计算技术指标（使用配置驱动）
+            # kline_data 为本次新获取的数据，只在此处追加指标列，无需先复制
+            kline_with_indicators = self.indicator_calculator.calculate_all_indicators(
+                kline_data, category
+            )
+            
+            # 保存数据
+            file_paths = self._save_timeframe_data(
+                kline_data, kline_with_indicators, symbol, timeframe
+            )
+            
+            logger.info(f"Successfully processed {timeframe}: {len(kline_with_indicators)} records")
+            return True, {
+                'timeframe': timeframe,
+                'records': len(kline_with_indicators),
+                'file_paths': file_paths
+            }
+            
+        except Exception as e:
+            logger.error(f"Error processing {timeframe}: {e}")
+            return False, {
+                'timeframe': timeframe,
+                'reason': str(e)
+            }
+    
     def _save_timeframe_data(self, kline_data, indicator_data, symbol, timeframe):
         """保存单个时间周期的数据（固定命名，覆盖模式）"""
         try:
             base_path = Path(self.base_directory) / timeframe
+            kline_config = self.config.get('kline_config', {}).get(timeframe, {})
+            save_format = kline_config.get('save_format', 'csv')
             
             # 使用固定文件名格式（移除_latest后缀，简化命名）
-            filename = f"{symbol}_{timeframe}.csv"
+            filename = f"{symbol}_{timeframe}.{save_format}"
             file_path = base_path / filename
             
             # 直接覆盖保存包含K线+技术指标的完整数据
-            indicator_data.to_csv(file_path, index=False)
+            if save_format == 'parquet':
+                indicator_data.to_parquet(file_path, index=False, compression='zstd')
+            else:
+                indicator_data.to_csv(file_path, index=False)
             
             logger.info(f"Saved/overwritten data to: {file_path}")
             
@@ -292,10 +363,11 @@ class SimpleDataManager:
             # 扫描所有时间周期目录
             for timeframe_dir in base_path.iterdir():
                 if timeframe_dir.is_dir():
-                    # 查找 *_latest.csv 文件
-                    for csv_file in timeframe_dir.glob("*_latest.csv"):
-                        relative_path = f"{timeframe_dir.name}/{csv_file.name}"
-                        files_to_authorize.append(relative_path)
+                    # 查找 *_latest.csv / *_latest.parquet 文件
+                    for suffix in DATA_FILE_SUFFIXES:
+                        for data_file in timeframe_dir.glob(f"*_latest{suffix}"):
+                            relative_path = f"{timeframe_dir.name}/{data_file.name}"
+                            files_to_authorize.append(relative_path)
             
             if not files_to_authorize:
                 logger.info("未找到需要授权的数据文件")
@@ -316,14 +388,8 @@ class SimpleDataManager:
                 "files": files_to_authorize
             }
             
-            # 使用配置中的MCP服务地址
-            config = ConfigLoader('config/enhanced_config.yaml').load_config()
-            mcp_config = config.get('mcp_service', {})
-            host = mcp_config.get('host', '127.0.0.1')
-            port = mcp_config.get('port', 5000)
-            
-            response = requests.post(
-                f"http://{host}:{port}/authorize",
+            response = self._http.post(
+                f"{self._mcp_base_url}/authorize",
                 json=data,
                 headers=headers,
                 timeout=10
@@ -363,7 +429,7 @@ class SimpleDataManager:
                     
                     # 查找所有相关文件
                     for file_path in timeframe_dir.iterdir():
-                        if file_path.is_file() and symbol in file_path.name and file_path.suffix == '.csv':
+                        if file_path.is_file() and symbol in file_path.name and file_path.suffix in DATA_FILE_SUFFIXES:
                             relative_path = f"{timeframe}/{file_path.name}"
                             existing_files.append(relative_path)
             
@@ -429,14 +495,8 @@ class SimpleDataManager:
                 "files": file_list
             }
             
-            # 使用配置中的MCP服务地址
-            config = ConfigLoader('config/enhanced_config.yaml').load_config()
-            mcp_config = config.get('mcp_service', {})
-            host = mcp_config.get('host', '127.0.0.1')
-            port = mcp_config.get('port', 5000)
-            
-            response = requests.post(
-                f"http://{host}:{port}/deauthorize",
+            response = self._http.post(
+                f"{self._mcp_base_url}/deauthorize",
                 json=data,
                 headers=headers,
                 timeout=10
@@ -460,14 +520,8 @@ class SimpleDataManager:
             
             headers = {"x-api-key": mcp_api_key}
             
-            # 使用配置中的MCP服务地址
-            config = ConfigLoader('config/enhanced_config.yaml').load_config()
-            mcp_config = config.get('mcp_service', {})
-            host = mcp_config.get('host', '127.0.0.1')
-            port = mcp_config.get('port', 5000)
-            
-            response = requests.get(
-                f"http://{host}:{port}/list_allowed_files",
+            response = self._http.get(
+                f"{self._mcp_base_url}/list_allowed_files",
                 headers=headers,
                 timeout=5
             )
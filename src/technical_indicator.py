@@ -1,10 +1,239 @@
-import pandas as pd
+import warnings
 import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from src.logger import setup_logger
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # 未安装numba时，内核按普通Python函数执行
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 logger = setup_logger()
 
 
+@njit(cache=True)
+def _rsi_core(close, window):
+    """单次遍历计算RSI：滑动窗口内涨跌幅均值（min_periods=1语义），平均跌幅为0时返回NaN"""
+    n = close.shape[0]
+    gain = np.zeros(n)
+    loss = np.zeros(n)
+    out = np.empty(n)
+    sum_gain = 0.0
+    sum_loss = 0.0
+    # 记录窗口内非零项个数，归零时重置累加和，避免浮点残差
+    nonzero_gain = 0
+    nonzero_loss = 0
+    for i in range(n):
+        if i > 0:
+            delta = close[i] - close[i - 1]
+            if delta > 0:
+                gain[i] = delta
+                nonzero_gain += 1
+            elif delta < 0:
+                loss[i] = -delta
+                nonzero_loss += 1
+        sum_gain += gain[i]
+        sum_loss += loss[i]
+        if i >= window:
+            old_gain = gain[i - window]
+            old_loss = loss[i - window]
+            if old_gain != 0.0:
+                sum_gain -= old_gain
+                nonzero_gain -= 1
+            if old_loss != 0.0:
+                sum_loss -= old_loss
+                nonzero_loss -= 1
+        if nonzero_gain == 0:
+            sum_gain = 0.0
+        if nonzero_loss == 0:
+            sum_loss = 0.0
+
+        count = min(i + 1, window)
+        if sum_loss == 0.0:
+            out[i] = np.nan
+        else:
+            rs = (sum_gain / count) / (sum_loss / count)
+            out[i] = 100.0 - 100.0 / (1.0 + rs)
+    return out
+
+
+@njit(cache=True)
+def _ewm_step(weighted, old_wt, cur, alpha):
+    """adjust=False 的EWM递推一步（与pandas一致：缺失值不更新均值，但权重继续衰减）"""
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if cur == cur:
+            if weighted != cur:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            old_wt = 1.0
+    elif cur == cur:
+        weighted = cur
+    return weighted, old_wt
+
+
+@njit(cache=True)
+def _macd_core(close, window_fast, window_slow, window_sign):
+    """单次遍历同时计算快/慢EMA及信号线，等价于 ewm(span, adjust=False).mean()"""
+    n = close.shape[0]
+    macd_line = np.empty(n)
+    signal = np.empty(n)
+    alpha_fast = 2.0 / (window_fast + 1.0)
+    alpha_slow = 2.0 / (window_slow + 1.0)
+    alpha_sign = 2.0 / (window_sign + 1.0)
+    ema_fast = np.nan
+    ema_slow = np.nan
+    ema_sign = np.nan
+    wt_fast = 1.0
+    wt_slow = 1.0
+    wt_sign = 1.0
+    for i in range(n):
+        ema_fast, wt_fast = _ewm_step(ema_fast, wt_fast, close[i], alpha_fast)
+        ema_slow, wt_slow = _ewm_step(ema_slow, wt_slow, close[i], alpha_slow)
+        macd_line[i] = ema_fast - ema_slow
+        ema_sign, wt_sign = _ewm_step(ema_sign, wt_sign, macd_line[i], alpha_sign)
+        signal[i] = ema_sign
+    return macd_line, signal
+
+
+@njit(cache=True)
+def _bbands_core(close, window, window_dev):
+    """单次遍历计算布林带上下轨：滑动窗口内均值与样本标准差（min_periods=1语义，跳过NaN）"""
+    n = close.shape[0]
+    upper = np.empty(n)
+    lower = np.empty(n)
+    # 以首个有效值为偏移量累加，避免价格量级较大时平方和相减的精度损失
+    shift = 0.0
+    for i in range(n):
+        if close[i] == close[i]:
+            shift = close[i]
+            break
+    sum_x = 0.0
+    sum_x2 = 0.0
+    count = 0
+    for i in range(n):
+        x = close[i]
+        if x == x:
+            d = x - shift
+            sum_x += d
+            sum_x2 += d * d
+            count += 1
+        if i >= window:
+            old = close[i - window]
+            if old == old:
+                d = old - shift
+                sum_x -= d
+                sum_x2 -= d * d
+                count -= 1
+        if count == 0:
+            # 窗口内无有效值时重置累加和，避免浮点残差
+            sum_x = 0.0
+            sum_x2 = 0.0
+            upper[i] = np.nan
+            lower[i] = np.nan
+            continue
+        mean = sum_x / count
+        if count == 1:
+            upper[i] = np.nan
+            lower[i] = np.nan
+            continue
+        var = (sum_x2 - sum_x * mean) / (count - 1)
+        if var < 0.0:
+            var = 0.0
+        band = window_dev * np.sqrt(var)
+        upper[i] = shift + mean + band
+        lower[i] = shift + mean - band
+    return upper, lower
+
+
+@njit(cache=True)
+def _atr_core(high, low, close, window):
+    """单次遍历计算ATR：逐根求真实波幅并维护滑动窗口均值（min_periods=1语义，跳过NaN）"""
+    n = close.shape[0]
+    tr = np.empty(n)
+    out = np.empty(n)
+    running_sum = 0.0
+    count = 0
+    for i in range(n):
+        # 三个候选值中取忽略NaN的最大值；首根K线没有前收盘价时TR即为 high-low
+        value = high[i] - low[i]
+        if i > 0:
+            prev_close = close[i - 1]
+            for candidate in (abs(high[i] - prev_close), abs(low[i] - prev_close)):
+                if candidate == candidate and not (value >= candidate):
+                    value = candidate
+        tr[i] = value
+        if value == value:
+            running_sum += value
+            count += 1
+        if i >= window:
+            old = tr[i - window]
+            if old == old:
+                running_sum -= old
+                count -= 1
+        if count == 0:
+            # 窗口内无有效值时重置累加和，避免浮点残差
+            running_sum = 0.0
+            out[i] = np.nan
+        else:
+            out[i] = running_sum / count
+    return out
+
+
+@njit(cache=True)
+def _vwap_core(high, low, close, volume):
+    """单次遍历同时累计成交额与成交量（跳过缺失值，与 pandas cumsum 一致），缺失行与累计量为0时输出NaN"""
+    n = close.shape[0]
+    out = np.empty(n)
+    cumulative_tpv = 0.0
+    cumulative_volume = 0.0
+    for i in range(n):
+        tpv = (high[i] + low[i] + close[i]) / 3 * volume[i]
+        if volume[i] == volume[i]:
+            cumulative_volume += volume[i]
+        if tpv != tpv:
+            out[i] = np.nan
+            continue
+        cumulative_tpv += tpv
+        if cumulative_volume == 0.0:
+            out[i] = np.nan
+        else:
+            out[i] = cumulative_tpv / cumulative_volume
+    return out
+
+
+def _bbands_numpy(close, window, window_dev):
+    """未安装numba时的布林带：在同一个尾随窗口视图上一次完成均值与标准差的向量化归约"""
+    if close.size == 0:
+        return close.copy(), close.copy()
+    # 前部补NaN，配合nan*归约即得到 min_periods=1 的结果（视图不复制数据）
+    padded = np.concatenate([np.full(window - 1, np.nan, dtype=close.dtype), close])
+    windows = sliding_window_view(padded, window)
+    with warnings.catch_warnings():
+        # 窗口内只有1个有效值时std为NaN（与pandas一致），忽略自由度告警
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(windows, axis=1)
+        std = np.nanstd(windows, axis=1, ddof=1)
+    return mean + window_dev * std, mean - window_dev * std
+
+
+def _as_float_array(values):
+    """取出浮点数组（接受Series或ndarray）：float32 输入保持单精度，其余统一转为 float64"""
+    if isinstance(values, np.ndarray):
+        if values.dtype == np.float32:
+            return values
+        return values.astype(np.float64, copy=False)
+    if values.dtype == np.float32:
+        return values.to_numpy()
+    return values.to_numpy(dtype=np.float64)
+
+
 class RSIIndicator:
     def __init__(self, close, window):
         self.close = close
@@ -12,17 +241,10 @@ class RSIIndicator:
 
     def rsi(self):
         try:
-            delta = self.close.diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            avg_gain = gain.rolling(window=self.window, min_periods=1).mean()
-            avg_loss = loss.rolling(window=self.window, min_periods=1).mean()
-            rs = avg_gain / avg_loss.replace(0, np.nan)
-            rsi = 100 - (100 / (1 + rs))
-            return rsi.fillna(0)
+            return _rsi_core(_as_float_array(self.close), int(self.window))
         except Exception as e:
             logger.error(f"Error calculating RSI: {e}")
-            return pd.Series(np.nan, index=self.close.index)
+            return np.full(len(self.close), np.nan)
 
 
 class BollingerBands:
@@ -33,14 +255,15 @@ class BollingerBands:
 
     def calculate(self):
         try:
-            mean = self.close.rolling(window=self.window, min_periods=1).mean()
-            std = self.close.rolling(window=self.window, min_periods=1).std()
-            upper = mean + self.window_dev * std
-            lower = mean - self.window_dev * std
-            return upper.fillna(0), lower.fillna(0)
+            # 窗口内只有1个有效值时std为NaN（与pandas一致），上下轨同为NaN
+            close = _as_float_array(self.close)
+            if not NUMBA_AVAILABLE:
+                # 纯Python逐点循环较慢，改用滑动窗口视图的向量化归约
+                return _bbands_numpy(close, int(self.window), float(self.window_dev))
+            return _bbands_core(close, int(self.window), float(self.window_dev))
         except Exception as e:
             logger.error(f"Error calculating Bollinger Bands: {e}")
-            return pd.Series(np.nan), pd.Series(np.nan)
+            return np.full(len(self.close), np.nan), np.full(len(self.close), np.nan)
 
 
 class MACD:
@@ -52,14 +275,13 @@ class MACD:
 
     def calculate(self):
         try:
-            ema_fast = self.close.ewm(span=self.window_fast, adjust=False).mean()
-            ema_slow = self.close.ewm(span=self.window_slow, adjust=False).mean()
-            macd_line = ema_fast - ema_slow
-            macd_signal = macd_line.ewm(span=self.window_sign, adjust=False).mean()
-            return macd_line.fillna(0), macd_signal.fillna(0)
+            return _macd_core(
+                _as_float_array(self.close),
+                float(self.window_fast), float(self.window_slow), float(self.window_sign)
+            )
         except Exception as e:
             logger.error(f"Error calculating MACD: {e}")
-            return pd.Series(np.nan), pd.Series(np.nan)
+            return np.full(len(self.close), np.nan), np.full(len(self.close), np.nan)
 
 
 class AverageTrueRange:
@@ -71,14 +293,13 @@ class AverageTrueRange:
 
     def calculate(self):
         try:
-            high_low = self.high - self.low
-            high_close = (self.high - self.close.shift()).abs()
-            low_close = (self.low - self.close.shift()).abs()
-            tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-            return tr.rolling(window=self.window, min_periods=1).mean().fillna(0)
+            return _atr_core(
+                _as_float_array(self.high), _as_float_array(self.low),
+                _as_float_array(self.close), int(self.window)
+            )
         except Exception as e:
             logger.error(f"Error calculating ATR: {e}")
-            return pd.Series(np.nan)
+            return np.full(len(self.close), np.nan)
 
 
 class VWAP:
@@ -87,39 +308,73 @@ class VWAP:
 
     def calculate(self):
         try:
-            tp = (self.df['high'] + self.df['low'] + self.df['close']) / 3
-            cumulative_tpv = (tp * self.df['volume']).cumsum()
-            cumulative_volume = self.df['volume'].cumsum()
-            return (cumulative_tpv / cumulative_volume).fillna(0)
+            return _vwap_core(
+                _as_float_array(self.df['high']), _as_float_array(self.df['low']),
+                _as_float_array(self.df['close']), _as_float_array(self.df['volume'])
+            )
         except Exception as e:
             logger.error(f"Error calculating VWAP: {e}")
-            return pd.Series(np.nan, index=self.df.index)
+            return np.full(len(self.df['close']), np.nan)
+
+
+INDICATOR_COLUMNS = ['rsi', 'bollinger_upper', 'bollinger_lower', 'macd', 'macd_signal', 'atr', 'vwap']
+
+
+def to_indicator_dicts(df):
+    """按行把指标列组装成字典列表（替代原先物化的 indicators 列，仅在需要时调用）"""
+    keys = tuple(INDICATOR_COLUMNS)
+    arrays = [df[col].to_numpy() for col in INDICATOR_COLUMNS]
+    return [dict(zip(keys, values)) for values in zip(*arrays)]
 
 
 class TechnicalIndicator:
-    def __init__(self, params):
+    def __init__(self, params, build_indicators_dict=False):
         self.params = params
+        # 参数中 use_fp32 为真时，默认以单精度计算指标
+        self.precision = 'float32' if params.get('use_fp32', False) else 'float64'
+        # 是否额外生成逐行字典形式的 indicators 列（默认关闭，只保留按列存储）
+        self.build_indicators_dict = build_indicators_dict
 
-    def calculate_all(self, df, category):
+    @staticmethod
+    def row_indicators(df, i):
+        """按需取出第 i 行（位置索引）的指标字典"""
+        return {col: df[col].iat[i] for col in INDICATOR_COLUMNS}
+
+    def calculate_all(self, df, category, precision=None):
+        """计算全部指标；precision='float32' 时指标在单精度价格副本上计算，原始OHLCV列保持不变（默认取 self.precision）"""
         logger.info(f"Calculating indicators for category: {category}")
+        if precision is None:
+            precision = self.precision
 
         # 数据清理
         required_columns = ['close', 'high', 'low', 'volume']
-        for col in required_columns:
-            if col not in df.columns:
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            # 显式 float64 零数组，所有缺失列共用一次分配
+            zeros = np.zeros(len(df), dtype=np.float64)
+            for col in missing_columns:
                 logger.warning(f"Missing '{col}' column. Filling with default values (0).")
-                df[col] = 0.0
+                df[col] = zeros
+
+        # 清理NaN：无缺失行时（常见情况）只做浅拷贝，新增指标列不影响调用方的DataFrame
+        valid = df['close'].notna() & df['high'].notna() & df['low'].notna()
+        if valid.all():
+            df = df.copy(deep=False)
+        else:
+            df = df.loc[valid]
 
-        df = df.dropna(subset=['close', 'high', 'low'])  # 清理NaN
+        # 指标输入：每列只转换一次为连续浮点数组，所有指标共用
+        dtype = np.float32 if precision == 'float32' else np.float64
+        prices = {col: df[col].to_numpy(dtype=dtype) for col in required_columns}
 
         # 计算 RSI
         logger.info("Calculating RSI...")
-        df['rsi'] = RSIIndicator(df['close'], self.params['rsi_window']).rsi()
+        df['rsi'] = RSIIndicator(prices['close'], self.params['rsi_window']).rsi()
 
         # 计算布林带
         logger.info("Calculating Bollinger Bands...")
         bb_upper, bb_lower = BollingerBands(
-            df['close'], self.params['bollinger_window'], self.params['bollinger_dev']
+            prices['close'], self.params['bollinger_window'], self.params['bollinger_dev']
         ).calculate()
         df['bollinger_upper'] = bb_upper
         df['bollinger_lower'] = bb_lower
@@ -127,40 +382,33 @@ class TechnicalIndicator:
         # 计算 MACD
         logger.info("Calculating MACD...")
         macd_line, macd_signal = MACD(
-            df['close'], self.params['macd_slow'], self.params['macd_fast'], self.params['macd_signal']
+            prices['close'], self.params['macd_slow'], self.params['macd_fast'], self.params['macd_signal']
         ).calculate()
         df['macd'] = macd_line
         df['macd_signal'] = macd_signal
 
         # 计算 ATR
         logger.info("Calculating ATR...")
-        df['atr'] = AverageTrueRange(df['high'], df['low'], df['close'], self.params['atr_window']).calculate()
+        df['atr'] = AverageTrueRange(prices['high'], prices['low'], prices['close'], self.params['atr_window']).calculate()
 
         # 计算 VWAP
         logger.info("Calculating VWAP...")
         if 'volume' in df.columns and df['volume'].sum() > 0:
-            df['vwap'] = VWAP(df).calculate()
+            df['vwap'] = VWAP(prices).calculate()
         else:
             logger.warning("VWAP skipped due to missing or invalid 'volume' data.")
             df['vwap'] = 0.0
 
-        # 整合指标
-        logger.info("Constructing indicators field...")
-        df['indicators'] = df.apply(
-            lambda row: {
-                "rsi": row['rsi'],
-                "bollinger_upper": row['bollinger_upper'],
-                "bollinger_lower": row['bollinger_lower'],
-                "macd": row['macd'],
-                "macd_signal": row['macd_signal'],
-                "atr": row['atr'],
-                "vwap": row['vwap']
-            }, axis=1
-        )
-
-        # 确保数值型字段不含 NaN
-        numeric_columns = ['rsi', 'bollinger_upper', 'bollinger_lower', 'macd', 'macd_signal', 'atr', 'vwap']
-        df[numeric_columns] = df[numeric_columns].fillna(0)
+        # 各指标返回原始数组，这里统一一次把 NaN 置0（指标只按列存储，需要逐行字典时用 to_indicator_dicts）
+        values = df[INDICATOR_COLUMNS].to_numpy(dtype=np.float64)
+        values[np.isnan(values)] = 0.0
+        df[INDICATOR_COLUMNS] = values
+
+        if self.build_indicators_dict:
+            df['indicators'] = to_indicator_dicts(df)
 
         logger.info("Indicators calculated successfully.")
+        index = df.index
+        if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+            return df
         return df.reset_index(drop=True)